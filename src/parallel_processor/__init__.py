@@ -1 +1 @@
-from .parallel_processor import ParallelProcessor, BasicProgressBar
\ No newline at end of file
+from .parallel_processor import ParallelProcessor, BasicProgressBar, SharedRef
\ No newline at end of file
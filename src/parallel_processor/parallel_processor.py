@@ -13,18 +13,41 @@ For best results, define the function in a separate file with light dependancies
 For more information and examples see ParallelProcessor.__doc__
 """
 
-import collections
+# pylint: disable=too-many-lines
+
+import atexit
+import math
+import os
+import threading
 import time
 import sys
 
+from collections import deque
+from functools import partial
+from itertools import chain, islice
 from importlib.util import find_spec
-from multiprocessing import Pool, cpu_count
-from multiprocessing.pool import AsyncResult
-from typing import Callable, Hashable, Iterable, Tuple, Union, Any
+from multiprocessing import Pool, get_all_start_methods, get_context
+from multiprocessing.pool import (
+    RUN,
+    AsyncResult,
+    IMapIterator,
+    MapResult,
+    ThreadPool,
+)
+
+# Python 3.8+
+if find_spec("multiprocessing.shared_memory"):
+    from multiprocessing.shared_memory import SharedMemory
+else:
+    SharedMemory = None  # pylint: disable=invalid-name
+
+from typing import Callable, Hashable, Iterable, Iterator, List, Tuple, Union, Any
 
 # pylint: disable=import-error
-if find_spec("tqdm"):
-    from tqdm import tqdm
+try:
+    from tqdm import tqdm as _TQDM
+except ImportError:
+    _TQDM = None
 
 
 ########################################################################################
@@ -44,13 +67,470 @@ __status__ = "Dev"
 
 ########################################################################################
 
+# Pools are cached by their backend, number of processes, and start method and shared
+#  between ParallelProcessor instances, so repeated instantiation or repeated calls to
+#  run() do not pay the cost of starting new worker processes each time.
+_POOL_CACHE = {}
+_POOL_CACHE_LOCK = threading.Lock()
+
+# Number of ParallelProcessor instances using each cached pool. ParallelProcessor.close
+#  only terminates a pool once no other instance is using it, so closing one instance
+#  cannot stop another mid-run.
+_POOL_USERS = {}
+
+# Number of CPUs this process may run on, read once at import rather than on every
+#  instantiation. Uses the CPU affinity where available, as os.cpu_count() counts all
+#  CPUs on the machine, e.g. in a container limited to a few of them. Falls back to 1
+#  where the number cannot be determined.
+if hasattr(os, "sched_getaffinity"):
+    _CPU_COUNT = len(os.sched_getaffinity(0))
+else:
+    _CPU_COUNT = os.cpu_count() or 1
+
+# Pool backends supported by ParallelProcessor
+_BACKENDS = ("process", "thread")
+
+# Stored as the kwargs of every process added without any, rather than a new empty
+#  dictionary for each. Never modified, as workers receive a copy when it is unpacked
+#  and ParallelProcessor.kwargs returns a new empty dictionary in its place.
+_NO_KWARGS = {}
+
+# Workers forked from a forkserver start from a small, clean process instead of a
+#  copy of the parent, which may hold large datasets or non fork-safe libraries such
+#  as GDAL. Falls back to the platform default where forkserver is unavailable. As
+#  with "spawn", workers import the main module, so scripts must guard their entry
+#  point with if __name__ == "__main__":.
+_DEFAULT_START_METHOD = (
+    "forkserver" if "forkserver" in get_all_start_methods() else None
+)
+
+########################################################################################
+
+
+def _pool_key(  # pylint: disable=too-many-arguments
+    threads: int,
+    start_method: str = None,
+    initializer: Callable = None,
+    initargs: Tuple = (),
+    backend: str = "process",
+    maxtasksperchild: int = None,
+) -> Tuple:
+    """Return the key a pool with the given settings is cached under. Thread pools
+     ignore start_method and maxtasksperchild."""
+
+    if backend == "thread":
+        start_method = maxtasksperchild = None
+
+    return (backend, threads, start_method, initializer, initargs, maxtasksperchild)
+
+
+########################################################################################
+
+
+def _pool_kwargs(
+    threads: int,
+    initializer: Callable = None,
+    initargs: Tuple = (),
+    backend: str = "process",
+    maxtasksperchild: int = None,
+) -> dict:
+    """Return the keyword arguments a pool with the given settings is created with.
+     multiprocessing.pool.ThreadPool does not accept maxtasksperchild."""
+
+    kwargs = {"processes": threads, "initializer": initializer, "initargs": initargs}
+
+    # Pass maxtasksperchild explicitly, as small values such as 10 make the pool
+    #  continually replace its worker processes, each of which must start and import
+    #  the worker's module again, which can stall long runs. None keeps each worker
+    #  for the lifetime of the pool.
+    if backend == "process":
+        kwargs["maxtasksperchild"] = maxtasksperchild
+
+    return kwargs
+
+
+########################################################################################
+
+
+def _get_cached_pool(  # pylint: disable=too-many-arguments
+    threads: int,
+    start_method: str = None,
+    preload: Iterable[str] = (),
+    initializer: Callable = None,
+    initargs: Tuple = (),
+    backend: str = "process",
+    maxtasksperchild: int = None,
+) -> Pool:
+    """Return the cached pool with the given backend, number of processes, start
+     method, initializer, and maxtasksperchild, creating it if it does not exist or
+     is no longer running.
+
+    Args:
+        threads (int): Number of worker processes, or threads for a thread pool.
+        start_method (str, optional): multiprocessing start method. Defaults to the
+             platform default.
+        preload (Iterable[str], optional): Modules for the forkserver to import
+             before forking workers. Only takes effect before the forkserver is first
+             started. Defaults to ().
+        initializer (Callable, optional): Function each worker process calls once
+             when it starts. Defaults to None.
+        initargs (Tuple, optional): Hashable arguments passed to initializer.
+             Defaults to ().
+        backend (str, optional): "process" for a multiprocessing.Pool or "thread"
+             for a multiprocessing.pool.ThreadPool, which ignores start_method and
+             preload. Defaults to "process".
+        maxtasksperchild (int, optional): Number of tasks each worker process
+             completes before it is replaced. Ignored by thread pools. Defaults to
+             None, which keeps workers for the lifetime of the pool.
+    """
+
+    key = _pool_key(
+        threads, start_method, initializer, initargs, backend, maxtasksperchild
+    )
+
+    with _POOL_CACHE_LOCK:
+        pool = _POOL_CACHE.get(key)
+
+        # pylint: disable=protected-access
+        if pool is None or pool._state != RUN:
+            if backend == "thread":
+                pool_class = ThreadPool
+
+            else:
+                context = get_context(start_method)
+
+                if context.get_start_method() == "forkserver":
+                    context.set_forkserver_preload(list(preload))
+
+                pool_class = context.Pool
+
+            pool = _POOL_CACHE[key] = pool_class(
+                **_pool_kwargs(
+                    threads, initializer, initargs, backend, maxtasksperchild
+                )
+            )
+
+    return pool
+
+
+########################################################################################
+
+
+def _acquire_cached_pool(key: Tuple) -> None:
+    """Add a user of the cached pool with the given key."""
+
+    with _POOL_CACHE_LOCK:
+        _POOL_USERS[key] = _POOL_USERS.get(key, 0) + 1
+
+
+########################################################################################
+
+
+def _release_cached_pool(key: Tuple, close: bool = False) -> None:
+    """Remove a user of the cached pool with the given key.
+
+    Args:
+        key (Tuple): The key the pool is cached under.
+        close (bool, optional): Whether to terminate the pool and remove it from the
+             cache if no other users remain. Defaults to False, which keeps it cached
+             for the next instance with the same settings.
+    """
+
+    with _POOL_CACHE_LOCK:
+        users = _POOL_USERS.pop(key, 0) - 1
+
+        if users > 0:
+            _POOL_USERS[key] = users
+            return
+
+        if not close:
+            return
+
+        pool = _POOL_CACHE.pop(key, None)
+
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+
+
+########################################################################################
+
+
+@atexit.register
+def _close_cached_pools() -> None:
+    """Terminate all cached pools. Registered to run at interpreter exit."""
+
+    with _POOL_CACHE_LOCK:
+        for pool in _POOL_CACHE.values():
+            pool.terminate()
+            pool.join()
+
+        _POOL_CACHE.clear()
+        _POOL_USERS.clear()
+
+
+########################################################################################
+
+
+def _wrap(worker: Callable, chunk: List[Tuple]) -> List[Tuple[int, Any]]:
+    """Call the worker for each (index, args, kwargs) payload in a chunk.
+
+    Defined at module level so it can be pickled and sent to the pool's workers.
+    The index is returned alongside each result so the caller can map it back to its
+     process_id when results arrive out of order.
+    """
+
+    return [(index, worker(*args, **kwargs)) for index, args, kwargs in chunk]
+
+
+########################################################################################
+
+
+def _wrap_args(worker: Callable, chunk: List[Tuple]) -> List[Tuple[int, Any]]:
+    """Same as _wrap, for (index, args) payloads when no process has kwargs."""
+
+    return [(index, worker(*args)) for index, args in chunk]
+
+
+########################################################################################
+
+
+def _wrap_single(worker: Callable, chunk: List[Tuple]) -> List[Tuple[int, Any]]:
+    """Same as _wrap, for (index, arg) payloads when every process has a single
+     positional argument and no kwargs."""
+
+    return [(index, worker(arg)) for index, arg in chunk]
+
+
+########################################################################################
+
+
+def _wrap_kwargs(worker: Callable, chunk: List[Tuple]) -> List[Tuple[int, Any]]:
+    """Same as _wrap, for (index, kwargs) payloads when no process has args."""
+
+    return [(index, worker(**kwargs)) for index, kwargs in chunk]
+
+
+########################################################################################
+
+
+def _auto_chunksize(n: int, threads: int) -> int:
+    """Number of tasks sent to a worker at a time by default, giving about 4 chunks
+     per worker: large enough to amortize IPC overhead, small enough to balance
+     uneven tasks between workers."""
+
+    return max(1, n // (threads * 4))
+
+
+########################################################################################
+
+
+def _iter_chunks(payloads: Iterator[Tuple], chunksize: int) -> Iterator[List[Tuple]]:
+    """Yield lists of up to chunksize payloads, building each only when requested."""
+
+    while True:
+        chunk = list(islice(payloads, chunksize))
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+########################################################################################
+
+
+def _iter_completed(iterator: IMapIterator, timeout: float) -> Iterator[Tuple]:
+    """Yield (index, result) tuples from an iterator of completed chunks, waiting at
+     most timeout seconds for each chunk."""
+
+    while True:
+        try:
+            chunk = iterator.next(timeout)
+        except StopIteration:
+            return
+
+        yield from chunk
+
+
+########################################################################################
+
+
+def _attach(value: Any, attached: dict) -> Any:
+    """Return the data a _SharedArray refers to, attaching to its shared memory unless
+     it is already in attached, or value unchanged if it is not a _SharedArray."""
+
+    if not isinstance(value, _SharedArray):
+        return value
+
+    if value.name not in attached:
+        attached[value.name] = value.attach()
+
+    return attached[value.name][1]
+
+
+########################################################################################
+
+
+def _wrap_shared(worker: Callable, chunk: List[Tuple]) -> List[Tuple[int, Any]]:
+    """Same as _wrap, but attaches any _SharedArray args or kwargs to their shared
+     memory before calling the worker and detaches them once the chunk completes.
+
+    Each segment is attached once per chunk, as values shared with
+     ParallelProcessor.share may be passed to every process in it.
+    """
+
+    results = []
+    attached = {}
+
+    try:
+        for index, args, kwargs in chunk:
+            args = [_attach(value, attached) for value in args]
+            kwargs = {key: _attach(value, attached) for key, value in kwargs.items()}
+
+            results.append((index, worker(*args, **kwargs)))
+
+    finally:
+        # Drop the references to the data before closing the handles
+        handles = [shm for shm, _ in attached.values()]
+        attached.clear()
+        args = kwargs = None
+
+        for shm in handles:
+            # A view of the buffer may still be referenced, e.g. by the result,
+            #  in which case the handle is closed when it is garbage collected
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+    return results
+
+
+########################################################################################
+
+
+class _SharedArray:
+    """Picklable reference to an argument copied into shared memory.
+
+    Only the segment name, size, and array layout are sent to workers, which attach
+     to the segment and read the data in place instead of unpickling a copy.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, name: str, nbytes: int, shape: Tuple = None, dtype: str = None):
+        self.name = name
+        self.nbytes = nbytes
+        self.shape = shape
+        self.dtype = dtype
+
+    ####################################################################################
+
+    def attach(self) -> Tuple[Any, Any]:
+        """Attach to the shared memory segment.
+
+        Returns:
+            Tuple[SharedMemory, Any]: The SharedMemory handle, which must be kept open
+                 while the data is in use, and the data as a numpy.ndarray if an array
+                 was shared, otherwise as a memoryview.
+        """
+
+        shm = SharedMemory(name=self.name)
+
+        if self.shape is None:
+            return shm, shm.buf[: self.nbytes]
+
+        # pylint: disable=import-outside-toplevel
+        import numpy as np
+
+        return shm, np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+
+########################################################################################
+
+
+class SharedRef:
+    """Reference to a value shared with ParallelProcessor.share, passed in func_args
+     or func_kwargs in place of the value.
+
+    Args:
+        name (Hashable): The name the value was shared under.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: Hashable):
+        self.name = name
+
+    ####################################################################################
+
+    def __repr__(self) -> str:
+        return f"SharedRef({self.name!r})"
+
+
+########################################################################################
+
+
+class _InlineResult:
+    """Result of a worker called directly in the current process, with the same
+     interface as multiprocessing.pool.AsyncResult."""
+
+    # The worker has already been called, so there is never anything to wait for
+    # pylint: disable=unused-argument
+
+    __slots__ = ("_value", "_success")
+
+    def __init__(self, worker: Callable, args: Tuple, kwargs: dict):
+        try:
+            self._value, self._success = worker(*args, **kwargs), True
+
+        # Raised again by get(), as it would be by AsyncResult.get()
+        except Exception as error:  # pylint: disable=broad-except
+            self._value, self._success = error, False
+
+    ####################################################################################
+
+    def ready(self) -> bool:
+        """Whether the call has completed, which it always has."""
+
+        return True
+
+    ####################################################################################
+
+    def successful(self) -> bool:
+        """Whether the call completed without raising an exception."""
+
+        return self._success
+
+    ####################################################################################
+
+    def wait(self, timeout: float = None) -> None:
+        """Return immediately, as the call has already completed."""
+
+    ####################################################################################
+
+    def get(self, timeout: float = None) -> Any:
+        """Return the result, or raise the exception raised by the worker."""
+
+        if not self._success:
+            raise self._value
+
+        return self._value
+
+
+########################################################################################
+
 
 class ParallelProcessor:
     """A class to run processs in parallel.
 
 
     Designed for parallelizing a single function across numerous arguments.
-    Utilizies multiprocessing.Pool and runs processes asynchronously.
+    Utilizies multiprocessing.Pool and runs processes asynchronously, or a
+     multiprocessing.pool.ThreadPool for I/O bound workers with backend="thread".
     Optionally provides a progressbar using tqdm or a basic custom progressbar if tqdm
      is not available.
 
@@ -59,8 +539,42 @@ class ParallelProcessor:
         worker (func, optional): The python function to run in parallel. Can be set
          using ParallelProcessor.set_worker(func).
                 Function must be imported into main script. Defaults to None.
-        threads (int, optional): The number of CPU threads to use. Defaults to
-         cpu_count().
+        threads (int, optional): The number of CPU threads to use. If None, defaults
+         to the number of CPUs this process may run on, read once at import.
+         Limited to that number for the "process" backend only. Defaults to None.
+        start_method (str, optional): The multiprocessing start method used to create
+         worker processes. Defaults to "forkserver" where available, otherwise the
+         platform default. With "forkserver" or "spawn", workers start from a fresh
+         interpreter rather than a copy of the current process, so its memory is
+         not duplicated, but the worker function must be defined at the top level
+         of an importable module so it can be pickled. Workers import the main
+         module when they start, so a script using a pool of processes must create
+         and run ParallelProcessor under an if __name__ == "__main__": guard, as in
+         the examples below, otherwise every worker fails to start.
+        preload (Tuple[str, ...], optional): Modules the forkserver imports once before
+         forking workers, in addition to the worker function's module. Only used
+         with the "forkserver" start method. Defaults to ().
+        initializer (func, optional): A function each worker process calls once when
+         it starts, e.g. to import modules or configure GDAL, instead of repeating
+         the setup in every call to the worker. Defaults to None.
+        initargs (Tuple, optional): Arguments passed to initializer. Must be
+         hashable, as pools are cached by their initializer. Defaults to ().
+        backend (str, optional): "process" to run the worker in a pool of processes,
+         or "thread" to run it in a pool of threads within the current process.
+         Threads avoid starting processes and pickling arguments and results, and
+         suit workers that release the GIL while they wait on I/O, e.g. GDAL. As
+         nothing is pickled, arguments and results need not be picklable.
+         Defaults to "process".
+        inline_single (bool, optional): Whether single tasks submitted with
+         ParallelProcessor._pool_apply_async are called directly in the current
+         process while the pool has not been started, rather than starting it for
+         one call. Defaults to True.
+        maxtasksperchild (int, optional): Number of tasks, i.e. chunks of processes,
+         each worker process completes before the pool replaces it with a new one.
+         Recycling workers frees memory leaked by the worker, but each new process
+         must start and import the worker's module again, so small values such as
+         10 can stall long runs. Ignored by the "thread" backend. Defaults to None,
+         which keeps workers for the lifetime of the pool.
 
 
     Examples:
@@ -75,14 +589,16 @@ class ParallelProcessor:
     >>>     print(f"Running process: {process_id}.")
     >>>     return process_id
 
-    >>> parallel_processor = ParallelProcessor(worker_func)
+    >>> # Required for process pools, as worker processes import the main module
+    >>> if __name__ == "__main__":
+    >>>     parallel_processor = ParallelProcessor(worker_func)
 
-    >>> for i in range(4):
-    >>>     parallel_processor.add_argument(process_id=i, func_args=i)
+    >>>     for i in range(4):
+    >>>         parallel_processor.add_argument(process_id=i, func_args=i)
 
-    >>> parallel_processor.run()
+    >>>     parallel_processor.run()
 
-    >>> results = parallel_processor.results
+    >>>     results = parallel_processor.results
 
     ####################################################################################
 
@@ -96,20 +612,21 @@ class ParallelProcessor:
     >>>     result = do_something()
     >>>     return result
 
-    >>> parallel_processor = ParallelProcessor(worker_func, threads=4)
+    >>> if __name__ == "__main__":
+    >>>     parallel_processor = ParallelProcessor(worker_func, threads=4)
 
-    >>> parallel_processor.add_argument(process_id=1, func_args=1)
-    >>> parallel_processor.add_argument(process_id=2, func_kwargs={"letter": "a"})
-    >>> parallel_processor.add_argument(
-    >>>     process_id=3, func_args=[3, 4], func_kwargs={"letter": "b"}
-    >>> )
-    >>> parallel_processor.add_argument(
-    >>>     process_id=4, func_args={5, 6}, func_kwargs={"letter": "c"}
-    >>> )
+    >>>     parallel_processor.add_argument(process_id=1, func_args=1)
+    >>>     parallel_processor.add_argument(process_id=2, func_kwargs={"letter": "a"})
+    >>>     parallel_processor.add_argument(
+    >>>         process_id=3, func_args=[3, 4], func_kwargs={"letter": "b"}
+    >>>     )
+    >>>     parallel_processor.add_argument(
+    >>>         process_id=4, func_args={5, 6}, func_kwargs={"letter": "c"}
+    >>>     )
 
-    >>> parallel_processor.run(progressbar=True, timeout=60)
+    >>>     parallel_processor.run(progressbar=True, timeout=60)
 
-    >>> results = parallel_processor.results
+    >>>     results = parallel_processor.results
 
     ####################################################################################
 
@@ -134,58 +651,278 @@ class ParallelProcessor:
     >>> ecw_ext = ".ecw"
     >>> gtiff_ext = ".tiff"
 
-    >>> ecws = Path(ecw_dir).rglob(f"*{ecw_ext}")
+    >>> if __name__ == "__main__":
+    >>>     ecws = Path(ecw_dir).rglob(f"*{ecw_ext}")
 
-    >>> parallel_processor = ParallelProcessor(gdal.Translate)
+    >>>     # gdal releases the GIL while translating, so threads avoid the overhead
+    >>>     #  of worker processes
+    >>>     parallel_processor = ParallelProcessor(gdal.Translate, backend="thread")
 
-    >>> for ecw in ecws:
-    >>>     id = ecw.name
-    >>>     input_filename = ecw.as_posix()
-    >>>     output_filename = Path(gtiff_dir).joinpath(
-    >>>         f"{ecw.stem}.{gtiff_ext}"
-    >>>     ).as_posix()
-    >>>     _args = [output_filename, input_filename]
-    >>>     parallel_processor.add_argument(
-    >>>     process_id=id, func_args=_args, func_kwargs=_kwargs
-    >>> )
+    >>>     for ecw in ecws:
+    >>>         id = ecw.name
+    >>>         input_filename = ecw.as_posix()
+    >>>         output_filename = Path(gtiff_dir).joinpath(
+    >>>             f"{ecw.stem}.{gtiff_ext}"
+    >>>         ).as_posix()
+    >>>         _args = [output_filename, input_filename]
+    >>>         parallel_processor.add_argument(
+    >>>             process_id=id, func_args=_args, func_kwargs=_kwargs
+    >>>         )
 
-    >>> parallel_processor.run(progressbar=True, timeout=60*10)
+    >>>     parallel_processor.run(progressbar=True, timeout=60*10)
 
-    >>> results = parallel_processor.results
+    >>>     results = parallel_processor.results
 
     ####################################################################################
 
     """
 
     # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-arguments
     # pylint: disable=expression-not-assigned
     # pylint: disable=consider-using-with
 
-    def __init__(self, worker: Callable = None, threads: int = cpu_count(),) -> None:
+    __slots__ = (
+        "threads",
+        "start_method",
+        "preload",
+        "initializer",
+        "initargs",
+        "backend",
+        "inline_single",
+        "maxtasksperchild",
+        "worker",
+        "_jobs",
+        "_shared_memory",
+        "_shared",
+        "_pool_user_key",
+        "results",
+    )
+
+    def __init__(
+        self,
+        worker: Callable = None,
+        threads: int = None,
+        start_method: str = _DEFAULT_START_METHOD,
+        preload: Tuple[str, ...] = (),
+        initializer: Callable = None,
+        initargs: Tuple = (),
+        backend: str = "process",
+        inline_single: bool = True,
+        maxtasksperchild: int = None,
+    ) -> None:
+
+        # Verify backend is supported
+        if backend not in _BACKENDS:
+            raise ValueError(
+                (
+                    f"ParallelProcessor.__init__: backend must be one of {_BACKENDS},",
+                    f" not '{backend}'.",
+                )
+            )
+
+        # Verify start_method is available on this platform, if passed
+        if start_method is not None and start_method not in get_all_start_methods():
+            raise ValueError(
+                (
+                    "ParallelProcessor.__init__: start_method must be one of",
+                    f" {get_all_start_methods()}, not '{start_method}'.",
+                )
+            )
+
+        # Verify initargs are hashable, as pools are cached by their initializer
+        try:
+            hash(tuple(initargs))
+        except TypeError as error:
+            raise ValueError(
+                (
+                    "ParallelProcessor.__init__: initargs must be hashable, not",
+                    f" '{initargs}'.",
+                )
+            ) from error
+
+        # Verify maxtasksperchild is a positive integer, if passed
+        if maxtasksperchild is not None and (
+            not isinstance(maxtasksperchild, int) or maxtasksperchild < 1
+        ):
+            raise ValueError(
+                (
+                    "ParallelProcessor.__init__: maxtasksperchild must be a positive",
+                    f" integer or None, not '{maxtasksperchild}'.",
+                )
+            )
+
+        if threads is None:
+            threads = _CPU_COUNT
+
+        # Verify threads is a positive integer, as pools are only created when run
+        if not isinstance(threads, int) or threads < 1:
+            raise ValueError(
+                (
+                    "ParallelProcessor.__init__: threads must be a positive integer or",
+                    f" None, not '{threads}'.",
+                )
+            )
 
-        # Set attributes based on __init__ arguments
-        self.threads = threads
+        # Set attributes based on __init__ arguments. Threads are not limited to the
+        #  number of CPUs, as thread pools are used for workers waiting on I/O.
+        self.threads = min(threads, _CPU_COUNT) if backend == "process" else threads
+        self.start_method = start_method
+        self.preload = tuple(preload)
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self.backend = backend
+        self.inline_single = inline_single
+        self.maxtasksperchild = maxtasksperchild
         self.set_worker(worker) if worker else setattr(self, "worker", None)
 
-        # Initialize empty attributes
-        self.ids = set()
-        self.args = {}
-        self.kwargs = {}
-        self.processes = {}
+        # Initialize empty attributes. Arguments are stored in the order they are added
+        #  as a dictionary of process_id: (args, kwargs) pairs.
+        self._jobs = {}
+        self._shared_memory = []
+        self._shared = {}
+        self._pool_user_key = None
         self.results = {}
 
-        # Initialize processing pool
-        self._init_pool()
+    ####################################################################################
+
+    def _get_pool(self) -> Pool:
+        """Return the multiprocessing.Pool used to run processes.
+
+
+        The pool is created on first use and cached at module level, so it is shared
+         with other ParallelProcessor instances using the same backend, number of
+         threads, start method, initializer, and maxtasksperchild and reused by
+         subsequent calls to ParallelProcessor.run. Cached pools are terminated by
+         ParallelProcessor.close once no other instance is using them, or when the
+         interpreter exits.
+        When the forkserver is started, the worker function's module, unless it is
+         the main module, is preloaded along with ParallelProcessor.preload so forked
+         workers do not import it again.
+        """
+
+        preload = self.preload
+
+        # The main module is never preloaded, as importing a script whose entry point
+        #  is not guarded would start it again in the forkserver
+        module = getattr(self.worker, "__module__", None)
+
+        if module and module != "__main__":
+            preload += (module,)
+
+        # Register as a user of the pool before it is returned, so it cannot be
+        #  terminated by another instance in between. Settings may have changed
+        #  since the pool was last used.
+        key = self._pool_key()
+
+        if self._pool_user_key != key:
+            _acquire_cached_pool(key)
+
+            if self._pool_user_key is not None:
+                _release_cached_pool(self._pool_user_key)
+
+            self._pool_user_key = key
+
+        return _get_cached_pool(
+            self.threads,
+            self.start_method,
+            preload,
+            self.initializer,
+            self.initargs,
+            self.backend,
+            self.maxtasksperchild,
+        )
+
+    ####################################################################################
+
+    def close(self) -> None:
+        """Remove stored arguments, release shared memory, including values shared
+         with ParallelProcessor.share, and terminate the pool used by this instance.
+
+
+        Pools are shared between instances with the same settings, so the pool is
+         only terminated once no other instance that has used it remains open.
+         Called automatically when used as a context manager.
+        Arguments that have not been run are removed, as they may refer to the
+         shared memory that is released.
+        """
+
+        self._clear_arguments()
+        self._release_shared()
+
+        if self._pool_user_key is not None:
+            _release_cached_pool(self._pool_user_key, close=True)
+            self._pool_user_key = None
 
     ####################################################################################
 
-    def _init_pool(self):
-        """Initialize multiprocessing.Pool as self._pool"""
+    def _pool_key(self) -> Tuple:
+        """Return the key this instance's pool is cached under."""
 
-        if self.threads > cpu_count():
-            self.threads = cpu_count()
+        return _pool_key(
+            self.threads,
+            self.start_method,
+            self.initializer,
+            self.initargs,
+            self.backend,
+            self.maxtasksperchild,
+        )
+
+    ####################################################################################
+
+    @property
+    def _pool_kwargs(self) -> dict:
+        """The keyword arguments this instance's pool is created with."""
+
+        return _pool_kwargs(
+            self.threads,
+            self.initializer,
+            self.initargs,
+            self.backend,
+            self.maxtasksperchild,
+        )
+
+    ####################################################################################
 
-        self._pool = Pool(processes=self.threads)
+    def _pool_running(self) -> bool:
+        """Whether this instance's pool has been created and is still running."""
+
+        pool = _POOL_CACHE.get(self._pool_key())
+
+        # pylint: disable=protected-access
+        return pool is not None and pool._state == RUN
+
+    ####################################################################################
+
+    def __enter__(self) -> "ParallelProcessor":
+        return self
+
+    ####################################################################################
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    ####################################################################################
+
+    def __del__(self) -> None:
+        """Release shared memory still held by arguments that were never run and by
+         values shared with ParallelProcessor.share.
+
+
+        The pool is not terminated, as it is cached for the next instance with the
+         same settings, but this instance no longer counts as one of its users. Use
+         ParallelProcessor.close or a with statement to terminate it.
+        """
+
+        # __init__ may have raised before the attribute was set
+        if getattr(self, "_shared_memory", None):
+            self._release_shared_memory()
+
+        if getattr(self, "_shared", None):
+            self._release_shared()
+
+        if getattr(self, "_pool_user_key", None) is not None:
+            _release_cached_pool(self._pool_user_key)
 
     ####################################################################################
 
@@ -197,6 +934,11 @@ class ParallelProcessor:
 
         Uses ParallelProcessor.worker as the worker function unless otherwise specified.
         Arguments args and/or kwargs must be passed.
+        Submits a single task. ParallelProcessor.run does not use this method, as it
+         submits all stored arguments in chunks with a single call to the pool.
+        If ParallelProcessor.inline_single is set and the pool has not been started,
+         the worker is called directly instead and its result returned as an
+         object with the same interface as AsyncResult.
 
         Args:
             worker (Callable, optional): Worker function to use. If 'None' defaults to
@@ -207,7 +949,7 @@ class ParallelProcessor:
                  function. Defaults to None.
 
         Returns:
-            AsyncResult: Result of Pool.apply_async().
+            AsyncResult: Result of Pool.apply_async(), or of the direct call.
 
         Raises:
             AttributeError: Raises an AttributeError if the worker function is not
@@ -235,37 +977,82 @@ class ParallelProcessor:
                 )
             )
 
+        # Call the worker directly rather than starting the pool for a single task
+        if self.inline_single and self.initializer is None and not self._pool_running():
+            return _InlineResult(worker, args or (), kwargs or {})
+
+        pool = self._get_pool()
+
         # Create async process
-        if args and kwargs:
-            async_result = self._pool.apply_async(worker, args=args, kwds=kwargs)
-        elif args and not kwargs:
-            async_result = self._pool.apply_async(worker, args=args)
-        else:
-            async_result = self._pool.apply_async(worker, kwds=kwargs)
+        return pool.apply_async(worker, args=args or (), kwds=kwargs or {})
+
+    ####################################################################################
 
-        # Return async_result
-        return async_result
+    @property
+    def pool(self) -> Pool:
+        """The pool used to run processes, created on first access. See
+         ParallelProcessor._get_pool."""
+
+        return self._get_pool()
+
+    ####################################################################################
+
+    @property
+    def ids(self) -> set:
+        """Set of process_ids that have been added."""
+
+        return set(self._jobs)
+
+    ####################################################################################
+
+    @property
+    def args(self) -> dict:
+        """Dictionary of process_id: func_args pairs, in the order they were added."""
+
+        return {process_id: args for process_id, (args, _) in self._jobs.items()}
+
+    ####################################################################################
+
+    @property
+    def kwargs(self) -> dict:
+        """Dictionary of process_id: func_kwargs pairs, in the order they were added.
+         Processes added without kwargs each get a new empty dictionary."""
+
+        # The shared empty kwargs dictionary is never returned, so it cannot be modified
+        return {
+            process_id: {} if kwargs is _NO_KWARGS else kwargs
+            for process_id, (_, kwargs) in self._jobs.items()
+        }
 
     ####################################################################################
 
     def set_worker(self, worker: Callable) -> None:
-        """Set the function to be run in parallel."""
+        """Set the function to be run in parallel.
+
+
+        Safe to call between runs: the worker is pickled and sent to the pool along
+         with each chunk of tasks, not bound to the pool when it is created.
+        """
 
         self.worker = worker
 
     ####################################################################################
 
-    def add_argument(
+    def add_argument(  # pylint: disable=too-many-branches
         self,
         process_id: Hashable,
         func_args: Union[Iterable, Any] = None,
         func_kwargs: dict = None,
+        shm_args: dict = None,
     ) -> None:
         """Add an argument and arguement id to the argument dictionary.
 
 
         Note: If only passing one func_arg it must be formatted (arg, ) otherwise it
          will produce an error.
+        Processes are submitted to the pool in the order they are added. When some
+         processes take much longer than others, add those first so they do not
+         start last and leave the other workers idle while they finish.
 
         Args:
             process_id (Hashable): Process ID. Used for retrieving outputs from
@@ -274,21 +1061,23 @@ class ParallelProcessor:
                  a single value or an iterable.
                 Whatever is passed will be converted to a tuple. Default is None.
             func_kwargs (dict): A dictionary of kwargs to pass to the worker function.
+                 Passing the same dictionary to many processes pickles it once per
+                 chunk rather than once per process. Default is None.
+            shm_args (dict): A dictionary of kwargs to pass to the worker function
+                 through shared memory instead of pickling. Values must be bytes-like
+                 or numpy arrays and are received by the worker as a read/write
+                 memoryview or numpy.ndarray. Requires python 3.8+. The shared memory
+                 is released along with the stored arguments, once
+                 ParallelProcessor.run completes successfully or
+                 ParallelProcessor.close is called. To pass the same
+                 value to many processes, use ParallelProcessor.share instead.
                  Default is None.
 
         Raises:
-            ValueError: Raises ValueError if process_id is already in use
+            ValueError: Raises ValueError if process_id is already in use or a
+                 SharedRef refers to a name that is not shared.
         """
 
-        # Verify process_id is hashable
-        if not isinstance(process_id, collections.Hashable):
-            raise ValueError(
-                (
-                    f"ParallelProcessor.add_argument: Argument ID '{process_id}' is not",
-                    " hashable. Argument not added.",
-                )
-            )
-
         # Verify func_kwargs a dictionary, if passed
         if func_kwargs and not isinstance(func_kwargs, dict):
             raise ValueError(
@@ -298,17 +1087,20 @@ class ParallelProcessor:
                 )
             )
 
-        # Verify func_args &/or func_kwargs are passed
-        if not func_args and not func_kwargs:
+        # Verify shared memory is supported, if shm_args are passed
+        if shm_args and SharedMemory is None:
             raise ValueError(
                 (
-                    "ParallelProcessor.add_argument: Neither func_args or func_kwargs",
-                    " passed. Argument not added.",
+                    "ParallelProcessor.add_argument: shm_args requires python 3.8+.",
+                    " Argument not added.",
                 )
             )
 
-        # Convert func_args to a tuple
-        if func_args and not isinstance(func_args, tuple):
+        # Convert func_args to a tuple once, when it is added
+        if func_args is None:
+            func_args = ()
+
+        elif not isinstance(func_args, tuple):
 
             # Manually define tuple if func_args is a string
             if isinstance(func_args, str):
@@ -322,14 +1114,32 @@ class ParallelProcessor:
             else:
                 func_args = (func_args,)
 
-        # Add process_id, func_args, and fun_kwargs to class instance attributes
-        if not process_id in self.ids:
-            self.ids.add(process_id)
-            self.args[process_id] = func_args
-            self.kwargs[process_id] = func_kwargs
+        # Verify func_args &/or func_kwargs are passed. Falsy values such as 0 or ""
+        #  are valid func_args, but empty iterables are not.
+        if not func_args and not func_kwargs and not shm_args:
+            raise ValueError(
+                (
+                    "ParallelProcessor.add_argument: Neither func_args or func_kwargs",
+                    " passed. Argument not added.",
+                )
+            )
 
-        # If process_if is already in use raise a ValueError
-        else:
+        # Add process_id, func_args, and func_kwargs to the stored arguments before
+        #  any further work. setdefault hashes process_id once to both verify it is
+        #  not in use and store it.
+        job = (func_args, func_kwargs or _NO_KWARGS)
+
+        try:
+            stored_job = self._jobs.setdefault(process_id, job)
+        except TypeError as error:
+            raise ValueError(
+                (
+                    f"ParallelProcessor.add_argument: Argument ID '{process_id}' is not",
+                    " hashable. Argument not added.",
+                )
+            ) from error
+
+        if stored_job is not job:
             raise ValueError(
                 (
                     f"ParallelProcessor.add_argument: Argument ID '{process_id}' already",
@@ -337,98 +1147,583 @@ class ParallelProcessor:
                 )
             )
 
+        shared_memory_count = len(self._shared_memory)
+
+        try:
+            # Replace references to values shared with ParallelProcessor.share with
+            #  references to their shared memory, if there are any
+            values = chain(func_args, func_kwargs.values() if func_kwargs else ())
+            shared_refs = any(isinstance(value, SharedRef) for value in values)
+
+            if shared_refs:
+                func_args = tuple(self._resolve_shared(value) for value in func_args)
+
+                if func_kwargs:
+                    func_kwargs = {
+                        key: self._resolve_shared(value)
+                        for key, value in func_kwargs.items()
+                    }
+
+            # Copy shm_args into shared memory and pass references to them as kwargs
+            if shm_args:
+                func_kwargs = dict(func_kwargs or {})
+
+                for key, value in shm_args.items():
+                    func_kwargs[key] = self._share(value)
+
+            # Replace the stored argument if its args or kwargs have been replaced
+            if shared_refs or shm_args:
+                self._jobs[process_id] = (func_args, func_kwargs or _NO_KWARGS)
+
+        # Remove the argument and any shared memory created for it if it could not be
+        #  added completely, including when interrupted
+        except BaseException:
+            del self._jobs[process_id]
+
+            for shm in self._shared_memory[shared_memory_count:]:
+                shm.close()
+                shm.unlink()
+
+            del self._shared_memory[shared_memory_count:]
+            raise
+
+    ####################################################################################
+
+    def _share(self, value: Any) -> _SharedArray:
+        """Copy a bytes-like object or numpy array into a new shared memory segment.
+
+        Raises:
+            ValueError: Raises a ValueError if value is not bytes-like or an array.
+        """
+
+        numpy = sys.modules.get("numpy")
+
+        if numpy is not None and isinstance(value, numpy.ndarray):
+            data = numpy.ascontiguousarray(value)
+            shape, dtype = data.shape, data.dtype.str
+        else:
+            try:
+                data = memoryview(value).cast("B")
+            except TypeError as error:
+                raise ValueError(
+                    (
+                        "ParallelProcessor: Values passed through shared memory must",
+                        " be bytes-like or numpy arrays, not",
+                        f" '{type(value).__name__}'.",
+                    )
+                ) from error
+
+            shape = dtype = None
+
+        # Shared memory segments cannot be empty
+        shm = SharedMemory(create=True, size=max(data.nbytes, 1))
+        self._shared_memory.append(shm)
+
+        if shape is None:
+            shm.buf[: data.nbytes] = data
+        else:
+            numpy.ndarray(shape, dtype=dtype, buffer=shm.buf)[...] = data
+
+        return _SharedArray(shm.name, data.nbytes, shape, dtype)
+
+    ####################################################################################
+
+    def share(self, name: Hashable, value: Any) -> SharedRef:
+        """Copy a value into shared memory once, to pass it to any number of processes.
+
+
+        Pass the returned SharedRef, or SharedRef(name), in func_args or func_kwargs
+         in place of the value. Only the reference is pickled for each process, and
+         the worker receives the value as a read/write memoryview or numpy.ndarray
+         read in place from shared memory. Requires python 3.8+.
+        Shared values are kept between runs, until ParallelProcessor.close is called.
+
+        Args:
+            name (Hashable): The name to refer to the value by.
+            value (Any): A bytes-like object or numpy array.
+
+        Returns:
+            SharedRef: A reference to the shared value.
+
+        Raises:
+            ValueError: Raises a ValueError if name is already in use, value is not
+                 bytes-like or an array, or shared memory is not supported.
+        """
+
+        # Verify shared memory is supported
+        if SharedMemory is None:
+            raise ValueError("ParallelProcessor.share: Requires python 3.8+.")
+
+        # Verify name is not already in use
+        if name in self._shared:
+            raise ValueError(
+                (
+                    f"ParallelProcessor.share: Name '{name}' already in use.",
+                    " Value not shared.",
+                )
+            )
+
+        reference = self._share(value)
+
+        # Keep the segment until close, rather than releasing it after the next run
+        self._shared[name] = (self._shared_memory.pop(), reference)
+
+        return SharedRef(name)
+
+    ####################################################################################
+
+    def _resolve_shared(self, value: Any) -> Any:
+        """Return the reference to the shared memory of the value a SharedRef refers
+         to, or value unchanged if it is not a SharedRef.
+
+        Raises:
+            ValueError: Raises a ValueError if nothing is shared under the name.
+        """
+
+        if not isinstance(value, SharedRef):
+            return value
+
+        try:
+            return self._shared[value.name][1]
+        except (KeyError, TypeError) as error:
+            raise ValueError(
+                (
+                    "ParallelProcessor.add_argument: Nothing is shared as",
+                    f" '{value.name}'. Argument not added.",
+                )
+            ) from error
+
+    ####################################################################################
+
+    def _release_shared(self) -> None:
+        """Close and unlink all shared memory segments created by share."""
+
+        for shm, _ in self._shared.values():
+            shm.close()
+            shm.unlink()
+
+        self._shared.clear()
+
     ####################################################################################
 
-    def _create_processes(self):
-        """Create processes from saved process_ids, func_args, and func_kwargs.
+    def _release_shared_memory(self) -> None:
+        """Close and unlink all shared memory segments created by add_argument."""
+
+        for shm in self._shared_memory:
+            shm.close()
+            shm.unlink()
+
+        self._shared_memory.clear()
+
+    ####################################################################################
 
+    def _clear_arguments(self, process_ids: List[Hashable] = None) -> None:
+        """Remove stored arguments and process_ids, keeping results, and release the
+         shared memory created for their shm_args.
 
-        After ParallelProcessor._create_processes is run the pool is closed, preventing
-         new processes from being created.
+        Args:
+            process_ids (List[Hashable], optional): The process_ids to remove, e.g.
+                 those run, keeping any added since. Defaults to None, which removes
+                 all arguments.
+        """
+
+        # Remove all arguments, unless others were added while the given ones ran
+        if process_ids is None or len(process_ids) == len(self._jobs):
+            self._jobs.clear()
+            self._release_shared_memory()
+            return
+
+        for process_id in process_ids:
+            self._jobs.pop(process_id, None)
+
+        # Keep the shared memory still referred to by the remaining arguments
+        names = {
+            value.name
+            for _, kwargs in self._jobs.values()
+            for value in kwargs.values()
+            if isinstance(value, _SharedArray)
+        }
+        kept = []
+
+        for shm in self._shared_memory:
+            if shm.name in names:
+                kept.append(shm)
+            else:
+                shm.close()
+                shm.unlink()
+
+        self._shared_memory[:] = kept
+
+    ####################################################################################
+
+    def _create_processes(
+        self,
+        stream: bool = True,
+        chunksize: int = None,
+        callback: Callable = None,
+        jobs: List[Tuple] = None,
+    ) -> Union[IMapIterator, MapResult]:
+        """Submit the stored arguments to the pool in chunks.
+
+
+        Each worker receives a chunk of arguments per pipe write. With stream=True
+         tasks are dispatched with Pool.imap_unordered and results stream back as
+         soon as each chunk completes, otherwise they are dispatched with a single
+         Pool.map_async and collected all at once.
+        The pool is left open so it can be reused by later runs.
+
+        Args:
+            stream (bool, optional): Whether to stream results as they complete.
+                 Defaults to True.
+            chunksize (int, optional): Number of tasks sent to a worker at a time.
+                 If None, about 4 chunks are sent to each worker. Defaults to None.
+            callback (Callable, optional): Called by the pool's result handler
+                 thread with the list of chunks once all have completed. Only used
+                 if stream is False. Defaults to None.
+            jobs (List[Tuple], optional): The (args, kwargs) pairs to submit. Defaults
+                 to None, which submits all stored arguments.
+
+        Returns:
+            Union[IMapIterator, MapResult]: Iterator yielding a list of (index, result)
+                 tuples for each chunk in completion order if stream is True,
+                 otherwise a MapResult returning the lists in submission order. index
+                 is the position of the argument in the order it was added.
 
         Raises:
-            AttributeError: Raises an Attribute error if not arguments are stored
+            AttributeError: Raises an Attribute error if not arguments are stored or if
+                 the worker function is not valid.
 
         """
 
+        self._validate_processes()
+
+        if jobs is None:
+            jobs = list(self._jobs.values())
+
+        # Send several tasks per chunk to amortize pickling and IPC overhead. Chunks
+        #  are built lazily as the pool dispatches them, not all up front.
+        if chunksize is None:
+            chunksize = _auto_chunksize(len(jobs), self.threads)
+
+        wrapper, payloads = self._payloads(jobs)
+        chunks = _iter_chunks(payloads, chunksize)
+
+        pool = self._get_pool()
+        func = partial(wrapper, self.worker)
+
+        # Create processes
+        if stream:
+            return pool.imap_unordered(func, chunks)
+
+        return pool.map_async(func, chunks, callback=callback)
+
+    ####################################################################################
+
+    def _store_results(self, process_ids: List[Hashable], chunks: List[List]) -> None:
+        """Store the (index, result) tuples in each chunk in ParallelProcessor.results,
+         mapping each index back to its process_id."""
+
+        for index, result in chain.from_iterable(chunks):
+            self.results[process_ids[index]] = result
+
+    ####################################################################################
+
+    def _validate_processes(self) -> None:
+        """Verify that arguments are stored and the worker function is set.
+
+        Raises:
+            AttributeError: Raises an Attribute error if not arguments are stored or if
+                 the worker function is not valid.
+        """
+
         # Verify arguments exist
-        if not self.ids or (not self.args and not self.kwargs):
+        if not self._jobs:
             raise AttributeError(
                 (
-                    "ParallelProcessor._create_processes: Processes cannot be created",
-                    " as arguments have not been stored with",
+                    "ParallelProcessor._validate_processes: Processes cannot be",
+                    " created as arguments have not been stored with",
                     " ParallelProcessor.set_arguments.",
                 )
             )
 
-        # Create processes
-        self.processes = {
-            id: self._pool_apply_async(
-                self.worker, args=self.args[id], kwargs=self.kwargs[id]
+        # Validate worker function is set
+        if not self.worker or not callable(self.worker):
+            raise AttributeError(
+                (
+                    "ParallelProcessor._validate_processes: 'worker' is not callable.",
+                    " Please set the worker function with ParallelProcessor.set_worker",
+                )
             )
-            for id in self.ids
-        }
 
-        # Prevent pool from taking new tasks
-        self._pool.close()
+    ####################################################################################
+
+    def _payloads(self, jobs: List[Tuple] = None) -> Tuple[Callable, Iterator[Tuple]]:
+        """Build the payload sent to the pool for each stored argument.
+
+
+        The payload shape is chosen once per run rather than per task: when no
+         process has kwargs (or no process has args) they are left out of the
+         payloads entirely and a matching wrapper calls the worker without them.
+         When every process has a single positional argument and no kwargs, the
+         argument is sent on its own and passed to the worker without unpacking.
+        Payloads are generated as they are consumed, so only the chunks in flight
+         are held in memory alongside the stored arguments.
+
+        Args:
+            jobs (List[Tuple], optional): The (args, kwargs) pairs to build payloads
+                 for. Payloads are generated in the pool's task handler thread, so a
+                 list is iterated rather than the stored arguments, which may change
+                 while they are generated. Defaults to None, which uses a list of all
+                 stored arguments.
+
+        Returns:
+            Tuple[Callable, Iterator[Tuple]]: The wrapper to call the worker with and
+                 an iterator of payloads, each starting with the argument's index.
+        """
+
+        if jobs is None:
+            jobs = list(self._jobs.values())
+
+        # Attach shared memory in the workers only if any argument refers to it. No
+        #  argument can unless this instance holds shared memory.
+        if (self._shared_memory or self._shared) and any(
+            isinstance(value, _SharedArray)
+            for args, kwargs in jobs
+            for value in chain(args, kwargs.values())
+        ):
+            return _wrap_shared, (
+                (index, args, kwargs) for index, (args, kwargs) in enumerate(jobs)
+            )
+
+        if not any(kwargs for _, kwargs in jobs):
+            if all(len(args) == 1 for args, _ in jobs):
+                return _wrap_single, (
+                    (index, args[0]) for index, (args, _) in enumerate(jobs)
+                )
+
+            return _wrap_args, ((index, args) for index, (args, _) in enumerate(jobs))
+
+        if not any(args for args, _ in jobs):
+            return _wrap_kwargs, (
+                (index, kwargs) for index, (_, kwargs) in enumerate(jobs)
+            )
+
+        return _wrap, (
+            (index, args, kwargs) for index, (args, kwargs) in enumerate(jobs)
+        )
 
     ####################################################################################
 
-    def run(self, progressbar: bool = False, timeout: float = 60.0 * 10):
+    def run(
+        self,
+        progressbar: bool = False,
+        timeout: float = 60.0 * 10,
+        force_pool: bool = False,
+        chunksize: int = None,
+    ):
         """Run worker function in parallel using multiprocessing.Pool and arguments
          provided.
 
+        With a progressbar, results are collected in the order processes complete, so
+         a slow process does not hold up the retrieval of faster ones. Without one,
+         all processes are submitted and collected in a single batch and results are
+         stored in the order arguments were added.
+        Processes are always submitted in the order arguments were added.
+        When threads is 1 or there is only one process, the worker is called directly
+         in the current process instead, as a pool cannot run anything in parallel
+         and would only add process start up, pickling, and IPC overhead. This is
+         skipped if an initializer is set.
+
         Args:
             progressbar (bool, optional): Whether to or not to display progress using
                  tqdm. Defaults to False.
-            timeout (float, optional): The timeout for each process in seconds.
-                 Defaults to 10 minutes.
+            timeout (float, optional): The timeout for each process in seconds. As
+                 processes are run in chunks, each chunk is waited on for timeout
+                 multiplied by the chunk size, or, without a progressbar, the batch
+                 is waited on for timeout multiplied by the number of processes per
+                 thread. Defaults to 10 minutes. Not applied when the worker is called
+                 directly.
+            force_pool (bool, optional): Whether to always run processes in the pool,
+                 e.g. to isolate the worker from the current process or to apply the
+                 timeout. Defaults to False.
+            chunksize (int, optional): Number of processes sent to a worker at a
+                 time. Larger chunks reduce IPC overhead for many short processes,
+                 smaller chunks balance processes of uneven length between workers.
+                 If None, max(1, processes // (threads * 4)). Defaults to None.
+
+        Raises:
+            ValueError: Raises a ValueError if chunksize is less than 1.
+
+        Note: Once all processes have completed the stored arguments are cleared to
+         free memory, leaving only ParallelProcessor.results. Copy
+         ParallelProcessor.args and ParallelProcessor.kwargs before calling run if
+         they are needed afterwards. Arguments are kept if run raises an error.
+        Note: Output the worker prints in a pool of processes is written to the
+         worker processes' stdout, which is inherited from the parent when the pool
+         starts, so it is not captured by contextlib.redirect_stdout in the current
+         process. Return output from the worker to collect it in
+         ParallelProcessor.results instead.
         """
 
-        # Create processes
-        self._create_processes()
+        # Results are stored in ParallelProcessor.results as they are retrieved, so
+        #  the pairs yielded are discarded
+        deque(
+            self._run(progressbar, timeout, force_pool, chunksize, stream=progressbar),
+            maxlen=0,
+        )
+
+        print(
+            "Processing complete. Results can be accessed via ParallelProcessor.results"
+        )
+
+    ####################################################################################
+
+    def run_iter(
+        self,
+        progressbar: bool = False,
+        timeout: float = 60.0 * 10,
+        force_pool: bool = False,
+        chunksize: int = None,
+    ) -> Iterator[Tuple[Hashable, Any]]:
+        """Run worker function in parallel like ParallelProcessor.run, yielding
+         results as they complete.
+
+
+        Results can be consumed, e.g. written to disk, while later processes are
+         still running, instead of waiting for all processes to complete. Each
+         result is also stored in ParallelProcessor.results. Processes are only
+         submitted once iteration starts.
+        Stored arguments, and the shared memory created for their shm_args, are
+         cleared once all results have been yielded. They are kept if the generator
+         is closed early, so the processes can be run again.
+
+        Args:
+            See ParallelProcessor.run.
+
+        Yields:
+            Tuple[Hashable, Any]: (process_id, result) pairs in the order processes
+                 complete.
+        """
+
+        return self._run(progressbar, timeout, force_pool, chunksize, stream=True)
+
+    ####################################################################################
+
+    def _run(  # pylint: disable=too-many-locals
+        self,
+        progressbar: bool,
+        timeout: float,
+        force_pool: bool,
+        chunksize: int,
+        stream: bool,
+    ) -> Iterator[Tuple[Hashable, Any]]:
+        """Run the stored processes, storing and yielding (process_id, result) pairs.
+
+        With stream=False, results are retrieved in a single batch and stored in
+         ParallelProcessor.results without being yielded, unless the worker is
+         called directly.
+        """
 
         # Ensure timeout is a float
         timeout = float(timeout)
 
+        # Run the arguments stored when the run starts. Arguments added while it runs
+        #  are kept for the next run. Results are returned with the index of their
+        #  argument, in the order added.
+        process_ids = list(self._jobs)
+        jobs = list(self._jobs.values())
+
+        # Verify chunksize is valid, if passed
+        if chunksize is None:
+            chunksize = _auto_chunksize(len(jobs), self.threads)
+
+        elif chunksize < 1:
+            raise ValueError(
+                (
+                    "ParallelProcessor.run: chunksize must be at least 1,",
+                    f" not '{chunksize}'.",
+                )
+            )
+
         # Retrieve progressbar function if dependancies are met
         if progressbar:
-            if "tqdm" in sys.modules:
-                progressbar_func = tqdm
+            if _TQDM is not None:
+                progressbar_func = _TQDM
             else:
                 print("Could not import tqdm. Basic progressbar will be used.")
                 progressbar_func = BasicProgressBar
         else:
             progressbar_func = None
 
-        # Run processes, retrieve results, print progress.
-        if progressbar and progressbar_func:
-            for item in progressbar_func(self.processes.items()):
-                process_id, async_result = item
-                self.results[process_id] = async_result.get(timeout)
+        inline = not force_pool and self.initializer is None
+        inline = inline and (self.threads == 1 or len(jobs) <= 1)
+
+        # Call the worker directly in this process, as results are requested
+        if inline:
+            self._validate_processes()
+            wrapper, payloads = self._payloads(jobs)
+            completed = chain.from_iterable(
+                wrapper(self.worker, [payload]) for payload in payloads
+            )
+
+        # Run processes, retrieve results as they complete
+        elif stream:
+            iterator = self._create_processes(chunksize=chunksize, jobs=jobs)
+            completed = _iter_completed(iterator, timeout * chunksize)
 
+        # Run processes, results are stored by the pool's result handler thread
+        #  as soon as the batch completes while this thread waits
         else:
-            for item in self.processes.items():
-                process_id, async_result = item
-                self.results[process_id] = async_result.get(timeout)
+            async_result = self._create_processes(
+                False, chunksize, partial(self._store_results, process_ids), jobs
+            )
+            async_result.get(timeout * math.ceil(len(jobs) / self.threads))
+            completed = ()
 
-        print(
-            "Processing complete. Results can be accessed via ParallelProcessor.results"
-        )
+        # Print progress as results are retrieved
+        if progressbar_func is not None:
+            completed = progressbar_func(completed, total=len(jobs))
+
+        for index, result in completed:
+            process_id = process_ids[index]
+            self.results[process_id] = result
+
+            yield process_id, result
+
+        # Only results are needed once all processes have completed. Shared memory
+        #  is kept with the arguments if a process failed, so they can be run again.
+        self._clear_arguments(process_ids)
 
 
 ########################################################################################
 
 
 class BasicProgressBar:
-    """Basic progressbar with no dependancies other than python 3.7+"""
+    """Basic progressbar with no dependancies other than python 3.7+
+
+    Args:
+        iterator (Iterable): The iterable to iterate over. Must support len() unless
+         total is passed.
+        mininterval (float, optional): Minimum number of seconds between progress
+         updates. The first and final updates are always printed. Defaults to 0.1.
+        total (int, optional): The number of items iterator yields, e.g. for a
+         generator of results. Defaults to len(iterator).
+    """
+
+    __slots__ = ("len", "i", "start_time", "mininterval", "_last_write", "_iterator")
+
+    # Progress message, formatted with the number of completed and total processes
+    #  and the hours, minutes, and seconds passed
+    _MESSAGE = "\rCompleted %d/%d processes. %d hours %d minutes %.2f seconds passed."
 
     ####################################################################################
 
-    def __init__(self, iterator):
-        self.len = len(iterator)
+    def __init__(self, iterator, mininterval: float = 0.1, total: int = None):
+        self.len = len(iterator) if total is None else total
         self.i = 0
         self.start_time = None
+        self.mininterval = mininterval
+        self._last_write = 0.0
         self._iterator = iterator.__iter__()
 
     ####################################################################################
@@ -440,17 +1735,23 @@ class BasicProgressBar:
 
     def __next__(self):
 
+        now = time.monotonic()
+
         if self.i == 0:
-            self.start_time = time.time()
+            self.start_time = now
 
-        msg = (
-            f"\rCompleted {self.i}/{self.len} processes. {self._time_passed()} passed."
-        )
+        # Skip formatting and writing progress if it was printed very recently
+        if self.i in (0, self.len) or now - self._last_write >= self.mininterval:
+            msg = self._MESSAGE % ((self.i, self.len) + self._time_passed(now))
 
-        if self.i == self.len:
-            msg += "\n"
+            if self.i == self.len:
+                msg += "\n"
 
-        sys.stdout.write(msg)
+            # Only the latest progress is written, as each line overwrites the last.
+            #  Flush so it is shown even when stdout is block buffered, e.g. in a pipe.
+            sys.stdout.write(msg)
+            sys.stdout.flush()
+            self._last_write = now
 
         self.i += 1
 
@@ -458,15 +1759,15 @@ class BasicProgressBar:
 
     ####################################################################################
 
-    def _time_passed(self):
+    def _time_passed(self, now: float = None) -> Tuple[int, int, float]:
+        """Return the hours, minutes, and seconds passed since iteration started."""
 
-        time_passed = time.time() - self.start_time
+        time_passed = (time.monotonic() if now is None else now) - self.start_time
 
-        hours = int(time_passed // 60 ** 2)
-        minutes = int((time_passed - hours * 60 ** 2) // 60)
-        seconds = time_passed - (hours * 60 ** 2 + minutes * 60)
+        minutes, seconds = divmod(time_passed, 60)
+        hours, minutes = divmod(int(minutes), 60)
 
-        return f"{hours} hours {minutes} minutes {seconds:.2f} seconds"
+        return hours, minutes, seconds
 
 ########################################################################################
 
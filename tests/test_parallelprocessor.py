@@ -1,13 +1,21 @@
 """Tests for parallel_processor.py"""
 
 import os
-import re
 import sys
 import multiprocessing
 
 from contextlib import redirect_stdout
 from importlib.util import find_spec
 from io import StringIO
+from pathlib import Path
+
+import pytest
+
+# Make the package in src importable without installing it, once per session
+_SRC = str(Path(__file__).resolve().parent.parent / "src")
+
+if _SRC not in sys.path:
+    sys.path.insert(1, _SRC)
 
 # pylint: disable=invalid-name
 # pylint: disable=redefined-outer-name
@@ -49,6 +57,113 @@ def dummy_worker_3(a, b=1):
 ########################################################################################
 
 
+def dummy_worker_4(data, scale=1):
+    """Dummy worker function for testing ParallelProcessor.run with shm_args"""
+
+    return sum(data) * scale
+
+
+########################################################################################
+
+# Set in worker processes by dummy_initializer
+INITIALIZED_VALUE = None
+
+
+def dummy_initializer(value):
+    """Dummy pool initializer for testing ParallelProcessor.run"""
+
+    # pylint: disable=global-statement
+    global INITIALIZED_VALUE
+    INITIALIZED_VALUE = value
+
+
+def dummy_worker_5(x):
+    """Dummy worker function for testing ParallelProcessor.run with an initializer"""
+
+    return INITIALIZED_VALUE * x
+
+
+########################################################################################
+
+
+def dummy_worker_6(_):
+    """Dummy worker function returning the id of the process it is run in"""
+
+    return os.getpid()
+
+
+########################################################################################
+
+# Appended to by dummy_worker_7 in the order it is called
+CALL_ORDER = []
+
+
+def dummy_worker_7(x):
+    """Dummy worker function recording the order it is called in"""
+
+    CALL_ORDER.append(x)
+
+    return x
+
+
+########################################################################################
+
+
+def dummy_worker_8(x, opts):
+    """Dummy worker function appending to a list passed as a kwarg"""
+
+    opts.append(x)
+
+    return len(opts)
+
+
+########################################################################################
+
+
+def dummy_worker_9(array, scale=1):
+    """Dummy worker function describing a numpy array passed through shared memory"""
+
+    return array.shape, array.dtype.str, (array * scale).tolist()
+
+
+########################################################################################
+
+
+def is_progress_line(line):
+    """Check a line matches BasicProgressBar's output format, e.g.
+     'Completed 3/10 processes. 0 hours 1 minutes 2.50 seconds passed.'"""
+
+    # Split the line into its fixed words and numbers
+    fields = line.split(" ")
+
+    if len(fields) != 10:
+        return False
+
+    words = [fields[i] for i in (0, 2, 4, 6, 8, 9)]
+
+    if words != ["Completed", "processes.", "hours", "minutes", "seconds", "passed."]:
+        return False
+
+    # Check the numbers of processes and time passed
+    completed, _, total = fields[1].partition("/")
+    whole_seconds, _, hundredths = fields[7].partition(".")
+
+    return (
+        completed.isdigit()
+        and total.isdigit()
+        and fields[3].isdigit()
+        and fields[5].isdigit()
+        and int(fields[5]) < 60
+        and whole_seconds.isdigit()
+        and int(whole_seconds) <= 60
+        and len(hundredths) == 2
+        and hundredths.isdigit()
+    )
+
+
+########################################################################################
+
+
 def test_parallelprocessor_import_1():
     """Test that parallelprocessor can be found by importlib."""
 
@@ -92,7 +207,13 @@ def test_parallelprocessor_import_3():
 ########################################################################################
 
 # Import classes to test
-from parallel_processor import ParallelProcessor, BasicProgressBar
+from parallel_processor import ParallelProcessor, BasicProgressBar, SharedRef
+from parallel_processor.parallel_processor import _auto_chunksize
+
+# Skips tests using multiprocessing.shared_memory, which requires python 3.8+
+requires_shared_memory = pytest.mark.skipif(
+    sys.version_info < (3, 8), reason="Shared memory requires python 3.8+"
+)
 
 ########################################################################################
 
@@ -100,23 +221,16 @@ from parallel_processor import ParallelProcessor, BasicProgressBar
 def test_basic_progress_bar():
     """Test BasicProgressBar works as expected."""
 
-    # Define progress print out regex pattern
-    progress_pattern = "".join(
-        (
-            "^Completed [0-9]+/[0-9]+ processes[.] [0-9]{1,2} hours",
-            " [1-6]*[0-9] minutes [1-6]*[0-9][.][0-9]{2} seconds passed[.]$",
-        )
-    )
-
     # Number of itervals
     n = 10
 
     # Variable to capture stdout as a string
     stdout_str = StringIO()
 
-    # Capture BasicProgressBar output from iterating through range(n)
+    # Capture BasicProgressBar output from iterating through range(n), printing
+    #  progress on every iteration
     with redirect_stdout(stdout_str):
-        _ = list(BasicProgressBar(range(n)))
+        _ = list(BasicProgressBar(range(n), mininterval=0))
 
     # Get stdout as string
     output = stdout_str.getvalue()
@@ -131,7 +245,59 @@ def test_basic_progress_bar():
     assert output.endswith("\n")
 
     # Check that all printed outputs match the correct pattern
-    assert all(re.match(progress_pattern, e) for e in output_split)
+    assert all(map(is_progress_line, output_split))
+
+
+########################################################################################
+
+
+def test_basic_progress_bar_2():
+    """Test BasicProgressBar only prints the first and final progress when iterating
+     faster than its mininterval."""
+
+    # Number of itervals
+    n = 10
+
+    # Variable to capture stdout as a string
+    stdout_str = StringIO()
+
+    # Capture BasicProgressBar output from iterating through range(n)
+    with redirect_stdout(stdout_str):
+        _ = list(BasicProgressBar(range(n), mininterval=60))
+
+    # Strip string and split based on carriage return
+    output_split = stdout_str.getvalue().strip().split("\r")
+
+    # Check that only the first and final progress have been printed
+    assert len(output_split) == 2
+    assert output_split[0].startswith(f"Completed 0/{n} ")
+    assert output_split[1].startswith(f"Completed {n}/{n} ")
+
+
+########################################################################################
+
+
+def test_basic_progress_bar_3():
+    """Test BasicProgressBar works with an iterator of unknown length if total is
+     passed."""
+
+    # Number of itervals
+    n = 10
+
+    # Variable to capture stdout as a string
+    stdout_str = StringIO()
+
+    # Capture BasicProgressBar output from iterating through a generator
+    with redirect_stdout(stdout_str):
+        output = list(BasicProgressBar((i for i in range(n)), mininterval=0, total=n))
+
+    # Strip string and split based on carriage return
+    output_split = stdout_str.getvalue().strip().split("\r")
+
+    # Check that all items are yielded and progress is printed on every iteration
+    assert output == list(range(n))
+    assert len(output_split) == n + 1
+    assert output_split[-1].startswith(f"Completed {n}/{n} ")
 
 
 ########################################################################################
@@ -157,26 +323,26 @@ def test_parallelprocessor_init_2():
 
     # Check that attributes are set as expected
 
-    assert getattr(parallel_processor, "threads") == os.cpu_count()
+    if hasattr(os, "sched_getaffinity"):
+        assert parallel_processor.threads == len(os.sched_getaffinity(0))
+    else:
+        assert parallel_processor.threads == os.cpu_count()
 
-    assert getattr(parallel_processor, "worker") is None
+    assert parallel_processor.worker is None
 
-    ids = getattr(parallel_processor, "ids")
+    ids = parallel_processor.ids
     assert not ids and isinstance(ids, set)
 
-    args = getattr(parallel_processor, "args")
+    args = parallel_processor.args
     assert not args and isinstance(args, dict)
 
-    kwargs = getattr(parallel_processor, "kwargs")
+    kwargs = parallel_processor.kwargs
     assert not kwargs and isinstance(kwargs, dict)
 
-    processes = getattr(parallel_processor, "processes")
-    assert not processes and isinstance(processes, dict)
-
-    results = getattr(parallel_processor, "results")
+    results = parallel_processor.results
     assert not results and isinstance(results, dict)
 
-    assert isinstance(getattr(parallel_processor, "_pool"), multiprocessing.pool.Pool)
+    assert isinstance(parallel_processor.pool, multiprocessing.pool.Pool)
 
 
 ########################################################################################
@@ -195,10 +361,124 @@ def test_parallelprocessor_init_3():
     parallel_processor = ParallelProcessor(worker=_worker, threads=_threads)
 
     # Check that threads attribute is set properly
-    assert getattr(parallel_processor, "threads") == _threads
+    assert parallel_processor.threads == _threads
 
     # Check that worker function is set properly
-    assert getattr(parallel_processor, "worker").__name__ == _worker.__name__
+    assert parallel_processor.worker.__name__ == _worker.__name__
+
+
+########################################################################################
+
+
+def test_parallelprocessor_init_4():
+    """Test ParallelProcessor instances with the same threads share a cached pool."""
+
+    # Init two ParallelProcessor instances
+    parallel_processor_1 = ParallelProcessor(threads=1)
+    parallel_processor_2 = ParallelProcessor(threads=1)
+
+    # Check that both instances use the same pool
+    assert parallel_processor_1._get_pool() is parallel_processor_2._get_pool()
+
+
+########################################################################################
+
+
+def test_parallelprocessor_init_5():
+    """Test ParallelProcessor raises a ValueError for an unknown start_method."""
+
+    try:
+        ParallelProcessor(start_method="teleport")
+        result = False
+
+    # Expecting a ValueError to be raised
+    except ValueError:
+        result = True
+
+    assert result
+
+
+########################################################################################
+
+
+def test_parallelprocessor_init_6():
+    """Test ParallelProcessor passes maxtasksperchild to process pools only and
+     raises a ValueError for a non-positive value."""
+
+    # Test the default keeps workers for the lifetime of the pool
+    result = ParallelProcessor()._pool_kwargs["maxtasksperchild"] is None
+
+    # Test maxtasksperchild is passed to process pools
+    parallel_processor = ParallelProcessor(maxtasksperchild=10)
+    result &= parallel_processor._pool_kwargs["maxtasksperchild"] == 10
+
+    # Test maxtasksperchild is not passed to thread pools, which do not accept it
+    thread_pool_kwargs = ParallelProcessor(
+        backend="thread", maxtasksperchild=10
+    )._pool_kwargs
+    result &= "maxtasksperchild" not in thread_pool_kwargs
+
+    try:
+        ParallelProcessor(maxtasksperchild=0)
+        result = False
+
+    # Expecting a ValueError to be raised
+    except ValueError:
+        pass
+
+    assert result
+
+
+########################################################################################
+
+
+def test_parallelprocessor_init_7():
+    """Test ParallelProcessor raises a ValueError for threads less than 1."""
+
+    for threads in (0, -1):
+        try:
+            ParallelProcessor(threads=threads)
+            result = False
+
+        # Expecting a ValueError to be raised
+        except ValueError:
+            result = True
+
+        assert result
+
+
+########################################################################################
+
+
+def test_parallelprocessor_init_8():
+    """Test ParallelProcessor raises a ValueError for an unknown backend."""
+
+    try:
+        ParallelProcessor(backend="gpu")
+        result = False
+
+    # Expecting a ValueError to be raised
+    except ValueError:
+        result = True
+
+    assert result
+
+
+########################################################################################
+
+
+def test_parallelprocessor_init_9():
+    """Test ParallelProcessor raises a ValueError for unhashable initargs."""
+
+    try:
+        ParallelProcessor(initializer=dummy_initializer, initargs=([1],))
+        result = False
+
+    # Expecting a ValueError to be raised
+    except ValueError:
+        result = True
+
+    assert result
 
 
 ########################################################################################
@@ -324,6 +604,46 @@ def test__pool_apply_async_5():
 ########################################################################################
 
 
+def test__pool_apply_async_6():
+    """Test ParallelProcessor._pool_apply_async calls the worker directly while the
+     pool has not been started, unless inline_single=False."""
+
+    # Init ParallelProcessor instances with a pool no other test uses
+    parallel_processor_1 = ParallelProcessor(threads=3, backend="thread")
+    parallel_processor_2 = ParallelProcessor(
+        threads=3, backend="thread", inline_single=False
+    )
+
+    # Check that the worker is called directly, without starting the pool
+    async_result = parallel_processor_1._pool_apply_async(dummy_worker_6, args=(1,))
+
+    assert async_result.get() == os.getpid()
+    assert not parallel_processor_1._pool_running()
+
+    # Check that errors are raised by get(), as by AsyncResult.get()
+    async_result = parallel_processor_1._pool_apply_async(dummy_worker_1, args=("",))
+
+    try:
+        async_result.get()
+        result = False
+
+    except TypeError:
+        result = True
+
+    assert result and not async_result.successful()
+
+    # Check that the pool is used with inline_single=False
+    async_result = parallel_processor_2._pool_apply_async(dummy_worker_1, args=(3,))
+
+    assert isinstance(async_result, multiprocessing.pool.AsyncResult)
+    assert async_result.get() == 9
+
+    parallel_processor_2.close()
+
+
+########################################################################################
+
+
 def test_set_worker():
     """Test ParallelProcessor.set_worker"""
 
@@ -364,9 +684,9 @@ def test_add_argument_1():
     )
 
     # Get set ids, args, kwargs dictionaries from ParallelProcessor instance
-    ids = getattr(parallel_processor, "ids")
-    args = getattr(parallel_processor, "args")
-    kwargs = getattr(parallel_processor, "kwargs")
+    ids = parallel_processor.ids
+    args = parallel_processor.args
+    kwargs = parallel_processor.kwargs
 
     # Check that process_ids are in ids
     # Check that args & kwargs are as expected
@@ -495,16 +815,21 @@ def test_add_argument_5():
     # process_id to pass
     _process_id = 1
 
-    try:
-        # Add arguments to ParallelProcessor instance
-        parallel_processor.add_argument(process_id=_process_id)
-        result = False
+    # Pass no func_args, and empty func_args
+    for _args in (None, (), [], set()):
+        try:
+            # Add arguments to ParallelProcessor instance
+            parallel_processor.add_argument(process_id=_process_id, func_args=_args)
+            result = False
 
-    # Expecting a ValueError to be raised
-    except ValueError:
-        result = True
+        # Expecting a ValueError to be raised
+        except ValueError:
+            result = True
 
-    assert result
+        assert result
+
+    # Check that no argument has been added
+    assert not parallel_processor.ids
 
 
 ########################################################################################
@@ -535,7 +860,7 @@ def test_add_argument_6():
         parallel_processor.add_argument(process_id=_process_id, func_args=arg)
 
     # Get args dictionary from ParallelProcessor instance
-    args_out = getattr(parallel_processor, "args")
+    args_out = parallel_processor.args
 
     # Check that all set args are tuples
     assert all(map(lambda x: isinstance(x, tuple), args_out.values()))
@@ -566,6 +891,134 @@ def test_add_argument_6():
 ########################################################################################
 
 
+def test_add_argument_7():
+    """Test ParallelProcessor.add_argument stores equal, but distinct, func_kwargs as
+     separate objects, so each process receives its own copy."""
+
+    # Init ParallelProcessor
+    parallel_processor = ParallelProcessor(worker=dummy_worker_8)
+
+    # Add arguments with equal, but distinct, mutable kwargs dictionaries
+    for i in range(1, 11):
+        parallel_processor.add_argument(
+            process_id=i, func_args=(i,), func_kwargs={"opts": []}
+        )
+
+    # Check that equal kwargs are not stored as a single object
+    kwargs = parallel_processor.kwargs
+
+    assert kwargs[1] is not kwargs[2] and kwargs[1] == kwargs[2]
+
+    # Check that no process sees another's changes when sent in one chunk
+    parallel_processor.run(force_pool=True, chunksize=10)
+
+    assert parallel_processor.results == {i: 1 for i in range(1, 11)}
+
+
+########################################################################################
+
+
+def test_add_argument_8():
+    """Test ParallelProcessor.add_argument accepts falsy func_args and converts them
+     to tuples once, when they are added."""
+
+    # Init ParallelProcessor
+    parallel_processor = ParallelProcessor(worker=repr)
+
+    # Add falsy single arguments
+    for i, arg in enumerate((0, False, "", 0.0)):
+        parallel_processor.add_argument(process_id=i, func_args=arg)
+
+    # Check that each arg is stored as a one element tuple
+    assert parallel_processor.args == {0: (0,), 1: (False,), 2: ("",), 3: (0.0,)}
+
+    # Check that the worker receives each arg unmodified
+    parallel_processor.run()
+
+    assert parallel_processor.results == {0: "0", 1: "False", 2: "''", 3: "0.0"}
+
+
+########################################################################################
+
+
+def test_add_argument_9():
+    """Test ParallelProcessor runs a worker and arguments that cannot be pickled, e.g.
+     lambdas, with backend="thread"."""
+
+    # Init ParallelProcessor with a worker calling the function it is passed
+    parallel_processor = ParallelProcessor(worker=lambda func: func(), backend="thread")
+
+    # Add arguments with lambdas, which cannot be pickled
+    for i in range(3):
+        parallel_processor.add_argument(process_id=i, func_args=(lambda i=i: i * 2,))
+
+    # Check that outputs are as expected when run in the pool
+    parallel_processor.run(force_pool=True)
+
+    assert parallel_processor.results == {0: 0, 1: 2, 2: 4}
+
+
+########################################################################################
+
+
+def test_add_argument_10():
+    """Test modifying the kwargs of a process added without any does not change the
+     kwargs of other processes or instances."""
+
+    # Init ParallelProcessor instances with args only arguments
+    parallel_processor_1 = ParallelProcessor(worker=dummy_worker_3)
+    parallel_processor_2 = ParallelProcessor(worker=dummy_worker_3)
+
+    for parallel_processor in (parallel_processor_1, parallel_processor_2):
+        parallel_processor.add_argument(process_id=1, func_args=(2,))
+        parallel_processor.add_argument(process_id=2, func_args=(3,))
+
+    # Modify the kwargs returned for one process
+    parallel_processor_1.kwargs[1]["b"] = 10
+
+    # Check that no stored kwargs have changed
+    assert parallel_processor_1.kwargs == {1: {}, 2: {}}
+
+    parallel_processor_2.run()
+
+    assert parallel_processor_2.results == {1: 2, 2: 3}
+
+
+########################################################################################
+
+
+@requires_shared_memory
+def test_add_argument_11():
+    """Test ParallelProcessor.add_argument stores nothing and releases any shared
+     memory it created when an argument cannot be added."""
+
+    # Init ParallelProcessor instance with one argument
+    parallel_processor = ParallelProcessor(worker=dummy_worker_4)
+    parallel_processor.add_argument(process_id=1, shm_args={"data": b"abc"})
+
+    # Add a duplicate process_id, and an argument with a value that cannot be shared
+    #  after one that can
+    for process_id, shm_args in ((1, {"data": b"abc"}), (2, {"a": b"a", "b": 1})):
+        try:
+            parallel_processor.add_argument(process_id=process_id, shm_args=shm_args)
+            result = False
+
+        # Expecting a ValueError to be raised
+        except ValueError:
+            result = True
+
+        assert result
+
+    # Check that only the first argument and its shared memory are stored
+    assert parallel_processor.ids == {1}
+    assert len(parallel_processor._shared_memory) == 1
+
+    parallel_processor.close()
+
+
+########################################################################################
+
+
 def test__create_processes_1():
     """Test ParallelProcessor._create_processes runs as expected."""
 
@@ -736,8 +1189,10 @@ def test_run_4():
     with redirect_stdout(stdout_str):
         parallel_processor.run(progressbar=False)
 
-    # Check the stdout string is empty
-    assert stdout_str.getvalue() != ""
+    # Check only the completion message is printed, without any progress
+    assert stdout_str.getvalue() == (
+        "Processing complete. Results can be accessed via ParallelProcessor.results\n"
+    )
 
     # Get results
     results = parallel_processor.results
@@ -848,6 +1303,643 @@ def test_run_7():
 ########################################################################################
 
 
+def test_run_8():
+    """Test ParallelProcessor.run can be called more than once on the same instance."""
+
+    # worker func
+    _worker = dummy_worker_1
+
+    # Init ParallelProcessor instance
+    parallel_processor = ParallelProcessor(worker=_worker, threads=2)
+
+    # Add arguments and call ParallelProcessor.run() twice, reusing the cached pool
+    for _ in range(2):
+        for i in range(1, 6):
+            parallel_processor.add_argument(process_id=_worker(i), func_args=(i,))
+
+        parallel_processor.run()
+
+    # Get results
+    results = parallel_processor.results
+
+    # Check that outputs are as expected
+    assert len(results) == 5 and all(k == v for k, v in results.items())
+
+
+########################################################################################
+
+
+def test_run_9():
+    """Test ParallelProcessor.run works as expected with the spawn start method."""
+
+    # worker func
+    _worker = dummy_worker_1
+
+    # Init ParallelProcessor instance
+    parallel_processor = ParallelProcessor(
+        worker=_worker, threads=2, start_method="spawn"
+    )
+
+    # Check that the pool's workers are created with the requested start method
+    assert parallel_processor._get_pool()._ctx.get_start_method() == "spawn"
+
+    # Add arguments to ParallelProcessor instance
+    for i in range(1, 6):
+        parallel_processor.add_argument(process_id=_worker(i), func_args=(i,))
+
+    # Call ParallelProcessor.run()
+    parallel_processor.run()
+
+    # Get results
+    results = parallel_processor.results
+
+    # Check that outputs are as expected
+    assert len(results) == 5 and all(k == v for k, v in results.items())
+
+
+########################################################################################
+
+
+def test_run_10():
+    """Test ParallelProcessor.run works as expected when processes are sent to the
+     pool in chunks of more than one."""
+
+    # worker func
+    _worker = dummy_worker_1
+
+    # Init ParallelProcessor instance
+    parallel_processor = ParallelProcessor(worker=_worker, threads=2)
+
+    # Add enough arguments to ParallelProcessor instance for a chunksize above 1
+    for i in range(1, 101):
+        parallel_processor.add_argument(process_id=_worker(i), func_args=(i,))
+
+    assert _auto_chunksize(len(parallel_processor.ids), parallel_processor.threads) > 1
+
+    # Call ParallelProcessor.run() with a progressbar
+    stdout_str = StringIO()
+    with redirect_stdout(stdout_str):
+        parallel_processor.run(progressbar=True)
+
+    # Get results
+    results = parallel_processor.results
+
+    # Check that outputs are as expected
+    assert len(results) == 100 and all(k == v for k, v in results.items())
+
+
+########################################################################################
+
+
+@requires_shared_memory
+def test_run_11():
+    """Test ParallelProcessor.run works as expected passing shm_args."""
+
+    # worker func
+    _worker = dummy_worker_4
+
+    # Init ParallelProcessor instance
+    parallel_processor = ParallelProcessor(worker=_worker, threads=2)
+
+    # Add arguments to ParallelProcessor instance, sharing data through shared memory
+    for i in range(1, 6):
+        data = bytes(range(i))
+        parallel_processor.add_argument(
+            process_id=_worker(data, scale=i),
+            func_kwargs={"scale": i},
+            shm_args={"data": data},
+        )
+
+    # Call ParallelProcessor.run()
+    parallel_processor.run()
+
+    # Get results
+    results = parallel_processor.results
+
+    # Check that outputs are as expected
+    assert len(results) == 5 and all(k == v for k, v in results.items())
+
+    # Check that shared memory has been released
+    assert not parallel_processor._shared_memory
+
+
+########################################################################################
+
+
+def test_run_12():
+    """Test ParallelProcessor.run works as expected with a pool initializer."""
+
+    # worker func
+    _worker = dummy_worker_5
+
+    # Init ParallelProcessor instance, setting INITIALIZED_VALUE to 3 in each worker
+    parallel_processor = ParallelProcessor(
+        worker=_worker, threads=2, initializer=dummy_initializer, initargs=(3,)
+    )
+
+    # Add arguments to ParallelProcessor instance
+    for i in range(1, 6):
+        parallel_processor.add_argument(process_id=i * 3, func_args=(i,))
+
+    # Call ParallelProcessor.run()
+    parallel_processor.run()
+
+    # Get results
+    results = parallel_processor.results
+
+    # Check that outputs are as expected
+    assert len(results) == 5 and all(k == v for k, v in results.items())
+
+
+########################################################################################
+
+
+def test_run_13():
+    """Test ParallelProcessor.run stores results in the order arguments were added
+     when progressbar=False."""
+
+    # worker func
+    _worker = dummy_worker_1
+
+    # Init ParallelProcessor instance
+    parallel_processor = ParallelProcessor(worker=_worker, threads=2)
+
+    # Add arguments to ParallelProcessor instance in descending order
+    process_ids = [_worker(i) for i in range(100, 0, -1)]
+    for i in range(100, 0, -1):
+        parallel_processor.add_argument(process_id=_worker(i), func_args=(i,))
+
+    # Call ParallelProcessor.run()
+    parallel_processor.run()
+
+    # Check that results are in the order arguments were added
+    assert list(parallel_processor.results) == process_ids
+    assert all(k == v for k, v in parallel_processor.results.items())
+
+
+########################################################################################
+
+
+def test_run_14():
+    """Test ParallelProcessor.run calls the worker directly when threads=1, unless
+     force_pool=True."""
+
+    # worker func
+    _worker = dummy_worker_6
+
+    # Init ParallelProcessor instances
+    parallel_processor_1 = ParallelProcessor(worker=_worker, threads=1)
+    parallel_processor_2 = ParallelProcessor(worker=_worker, threads=1)
+
+    # Add arguments to ParallelProcessor instances
+    for i in range(1, 6):
+        parallel_processor_1.add_argument(process_id=i, func_args=(i,))
+        parallel_processor_2.add_argument(process_id=i, func_args=(i,))
+
+    # Call ParallelProcessor.run() with and without the pool
+    parallel_processor_1.run(progressbar=True)
+    parallel_processor_2.run(force_pool=True)
+
+    # Check that processes ran in this process only without the pool
+    assert set(parallel_processor_1.results.values()) == {os.getpid()}
+    assert os.getpid() not in parallel_processor_2.results.values()
+
+
+########################################################################################
+
+
+def test_run_15():
+    """Test ParallelProcessor.run works with backend="thread"."""
+
+    # Init ParallelProcessor
+    parallel_processor = ParallelProcessor(
+        worker=dummy_worker_2, threads=2, backend="thread"
+    )
+
+    # Check that threads are not limited to the number of CPUs and a ThreadPool is
+    #  used
+    assert parallel_processor.threads == 2
+    assert isinstance(parallel_processor._get_pool(), multiprocessing.pool.ThreadPool)
+
+    # Call ParallelProcessor.run() with and without a progressbar
+    for progressbar in (True, False):
+        parallel_processor.results = {}
+
+        for i in range(1, 21):
+            parallel_processor.add_argument(process_id=i, func_args=(i, 2))
+
+        parallel_processor.run(progressbar=progressbar)
+
+        assert parallel_processor.results == {i: i * 2 for i in range(1, 21)}
+
+
+########################################################################################
+
+
+def test_run_16():
+    """Test ParallelProcessor.run submits processes in the order they were added."""
+
+    # Init ParallelProcessor with a single worker thread, so processes are run in
+    #  the order they are submitted
+    parallel_processor = ParallelProcessor(
+        worker=dummy_worker_7, threads=1, backend="thread"
+    )
+
+    # Add arguments in descending order
+    ids = list(range(50, 0, -1))
+
+    for i in ids:
+        parallel_processor.add_argument(process_id=i, func_args=(i,))
+
+    # Call ParallelProcessor.run() in the pool
+    CALL_ORDER.clear()
+    parallel_processor.run(force_pool=True)
+
+    # Check that the worker was called in the order arguments were added
+    assert CALL_ORDER == ids
+
+
+########################################################################################
+
+
+def test_run_17():
+    """Test ParallelProcessor.run clears stored arguments but keeps results once
+     processes complete."""
+
+    # Init ParallelProcessor
+    parallel_processor = ParallelProcessor(worker=dummy_worker_3)
+
+    # Add arguments to ParallelProcessor instance
+    for i in range(1, 6):
+        parallel_processor.add_argument(
+            process_id=i, func_args=(i,), func_kwargs={"b": 2}
+        )
+
+    # Call ParallelProcessor.run()
+    parallel_processor.run()
+
+    # Check that arguments have been cleared and results kept
+    assert not parallel_processor.ids
+    assert not parallel_processor.args and not parallel_processor.kwargs
+    assert parallel_processor.results == {i: i * 2 for i in range(1, 6)}
+
+
+########################################################################################
+
+
+def test_run_18():
+    """Test ParallelProcessor terminates its pool when used as a context manager."""
+
+    # Run ParallelProcessor in the pool within a with statement
+    with ParallelProcessor(worker=dummy_worker_1, threads=1) as parallel_processor:
+        for i in range(1, 6):
+            parallel_processor.add_argument(process_id=i, func_args=(i,))
+
+        parallel_processor.run(force_pool=True)
+        pool = parallel_processor._get_pool()
+
+    # Check that outputs are as expected and the pool has been terminated
+    assert parallel_processor.results == {i: i ** 2 for i in range(1, 6)}
+    assert pool._state != multiprocessing.pool.RUN
+
+    # Check that a new pool is created for the next instance
+    assert ParallelProcessor(threads=1)._get_pool() is not pool
+
+
+########################################################################################
+
+
+def test_run_19():
+    """Test ParallelProcessor.run completes 1000 processes with the default and an
+     explicit chunksize."""
+
+    # worker func
+    _worker = dummy_worker_1
+
+    # Init ParallelProcessor instance
+    parallel_processor = ParallelProcessor(worker=_worker, threads=2)
+
+    # Call ParallelProcessor.run() in the pool with each chunksize
+    for chunksize in (None, 7):
+        parallel_processor.results = {}
+
+        for i in range(1000):
+            parallel_processor.add_argument(process_id=i, func_args=(i,))
+
+        parallel_processor.run(force_pool=True, chunksize=chunksize)
+
+        assert parallel_processor.results == {i: _worker(i) for i in range(1000)}
+
+
+########################################################################################
+
+
+def test_run_20():
+    """Test ParallelProcessor.run passes single arguments, including tuples, and
+     varying numbers of arguments to the worker unchanged."""
+
+    # Init ParallelProcessor instance
+    parallel_processor = ParallelProcessor(worker=repr, threads=2)
+
+    # Add single arguments, one of which is itself a tuple
+    _args = [(1,), ((2, 3),), ("a",)]
+
+    for _process_id, arg in enumerate(_args):
+        parallel_processor.add_argument(process_id=_process_id, func_args=arg)
+
+    parallel_processor.run(force_pool=True)
+
+    result = parallel_processor.results == {0: "1", 1: "(2, 3)", 2: "'a'"}
+
+    # Add one and two arguments to a worker with a default argument
+    parallel_processor.set_worker(dummy_worker_3)
+    parallel_processor.results = {}
+    parallel_processor.add_argument(process_id=0, func_args=(2,))
+    parallel_processor.add_argument(process_id=1, func_args=(2, 3))
+
+    parallel_processor.run(force_pool=True)
+
+    result &= parallel_processor.results == {0: 2, 1: 6}
+
+    assert result
+
+
+########################################################################################
+
+
+@requires_shared_memory
+def test_run_21():
+    """Test ParallelProcessor.run passes a value shared with ParallelProcessor.share to
+     every process and keeps it between runs until ParallelProcessor.close."""
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    # worker func
+    _worker = dummy_worker_4
+
+    # Init ParallelProcessor instance and share data once for all processes
+    parallel_processor = ParallelProcessor(worker=_worker, threads=2)
+    data = bytes(range(10))
+    shared = parallel_processor.share("data", data)
+
+    # Call ParallelProcessor.run() twice, referring to the data by either reference
+    for reference in (shared, SharedRef("data")):
+        for i in range(1, 6):
+            parallel_processor.add_argument(
+                process_id=i, func_args=(reference,), func_kwargs={"scale": i}
+            )
+
+        parallel_processor.run(force_pool=True)
+
+        assert parallel_processor.results == {i: sum(data) * i for i in range(1, 6)}
+
+    # Check that unknown and reused names raise a ValueError, including for an
+    #  instance that has nothing shared
+    for call in (
+        lambda: parallel_processor.add_argument(1, func_args=(SharedRef("other"),)),
+        lambda: parallel_processor.share("data", data),
+        lambda: ParallelProcessor().add_argument(1, func_args=(SharedRef("data"),)),
+        lambda: ParallelProcessor().add_argument(1, func_kwargs={"a": shared}),
+    ):
+        try:
+            call()
+            result = False
+
+        # Expecting a ValueError to be raised
+        except ValueError:
+            result = True
+
+        assert result
+
+    name = parallel_processor._shared["data"][0].name
+    parallel_processor.close()
+
+    # Check that the shared memory segment has been unlinked
+    try:
+        SharedMemory(name=name).close()
+        result = False
+
+    except FileNotFoundError:
+        result = True
+
+    assert result
+
+
+########################################################################################
+
+
+@requires_shared_memory
+def test_run_22():
+    """Test ParallelProcessor.run can run shm_args again after a failed run or a
+     run_iter generator closed early."""
+
+    # worker func
+    _worker = dummy_worker_4
+
+    # Init ParallelProcessor instance without a worker, so the first run fails
+    parallel_processor = ParallelProcessor(threads=2)
+
+    # Add arguments to ParallelProcessor instance, sharing data through shared memory
+    for i in range(1, 6):
+        parallel_processor.add_argument(
+            process_id=i, func_kwargs={"scale": i}, shm_args={"data": bytes(range(i))}
+        )
+
+    try:
+        parallel_processor.run(force_pool=True)
+        result = False
+
+    # Expecting an AttributeError to be raised
+    except AttributeError:
+        result = True
+
+    assert result
+
+    # Close a run_iter generator after its first result
+    parallel_processor.set_worker(_worker)
+    iterator = parallel_processor.run_iter(force_pool=True, chunksize=1)
+    next(iterator)
+    iterator.close()
+
+    # Check the arguments and their shared memory can still be run
+    parallel_processor.run(force_pool=True)
+
+    expected = {i: _worker(bytes(range(i)), scale=i) for i in range(1, 6)}
+
+    assert parallel_processor.results == expected
+    assert not parallel_processor._shared_memory
+
+
+########################################################################################
+
+
+def test_run_23():
+    """Test closing one ParallelProcessor does not terminate a pool another instance
+     is running processes in."""
+
+    # Start running processes in the pool, retrieving one at a time
+    parallel_processor_1 = ParallelProcessor(worker=dummy_worker_1, threads=1)
+
+    for i in range(1, 6):
+        parallel_processor_1.add_argument(process_id=i, func_args=(i,))
+
+    iterator = parallel_processor_1.run_iter(force_pool=True, timeout=10, chunksize=1)
+    results = dict([next(iterator)])
+
+    # Close an instance with the same settings that has used the pool, and another
+    #  that has not, mid-run
+    parallel_processor_2 = ParallelProcessor(threads=1)
+    pool = parallel_processor_2.pool
+    parallel_processor_2.close()
+
+    with ParallelProcessor(threads=1):
+        pass
+
+    # Check that the remaining processes complete in the same pool
+    results.update(iterator)
+
+    assert results == {i: i ** 2 for i in range(1, 6)}
+    assert pool._state == multiprocessing.pool.RUN
+
+    # Check that the pool is terminated once its last user is closed
+    parallel_processor_1.close()
+
+    assert pool._state != multiprocessing.pool.RUN
+
+
+########################################################################################
+
+
+@requires_shared_memory
+def test_run_24():
+    """Test ParallelProcessor.run passes numpy arrays through shared memory with their
+     shape and dtype, with shm_args and ParallelProcessor.share."""
+
+    np = pytest.importorskip("numpy")
+
+    # worker func
+    _worker = dummy_worker_9
+
+    # Init ParallelProcessor instance
+    parallel_processor = ParallelProcessor(worker=_worker, threads=2)
+
+    # Share a non-contiguous array with each process, and one array with all of them
+    arrays = {i: np.arange(i * 6, dtype="float32").reshape(i * 2, 3).T for i in (1, 2)}
+    shared = parallel_processor.share("array", np.arange(4, dtype="int16"))
+
+    for i, array in arrays.items():
+        parallel_processor.add_argument(process_id=i, shm_args={"array": array})
+        parallel_processor.add_argument(
+            process_id=-i, func_args=(shared,), func_kwargs={"scale": i}
+        )
+
+    parallel_processor.run(force_pool=True)
+
+    # Check that outputs are as expected
+    expected = {i: _worker(array) for i, array in arrays.items()}
+    expected.update({-i: _worker(np.arange(4, dtype="int16"), i) for i in (1, 2)})
+
+    assert parallel_processor.results == expected
+
+    parallel_processor.close()
+
+
+########################################################################################
+
+
+@requires_shared_memory
+def test___del___1():
+    """Test ParallelProcessor releases shared memory when it is garbage collected
+     without being run."""
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    # Init ParallelProcessor instance and add an argument through shared memory
+    parallel_processor = ParallelProcessor(worker=dummy_worker_4)
+    parallel_processor.add_argument(process_id=1, shm_args={"data": b"abc"})
+
+    name = parallel_processor._shared_memory[0].name
+
+    # Delete the instance without running it
+    del parallel_processor
+
+    # Check that the shared memory segment has been unlinked
+    try:
+        SharedMemory(name=name).close()
+        result = False
+
+    except FileNotFoundError:
+        result = True
+
+    assert result
+
+
+########################################################################################
+
+
+def test_run_iter_1():
+    """Test ParallelProcessor.run_iter yields results as processes complete."""
+
+    # worker func
+    _worker = dummy_worker_1
+
+    # Init ParallelProcessor instance
+    parallel_processor = ParallelProcessor(worker=_worker, threads=2)
+
+    # Add arguments to ParallelProcessor instance
+    for i in range(1, 51):
+        parallel_processor.add_argument(process_id=i, func_args=(i,))
+
+    # Consume results from ParallelProcessor.run_iter() in the pool
+    results = dict(parallel_processor.run_iter(force_pool=True))
+
+    # Check that all results are yielded and stored, and arguments are cleared
+    assert results == {i: _worker(i) for i in range(1, 51)}
+    assert parallel_processor.results == results
+    assert not parallel_processor.ids
+
+
+########################################################################################
+
+
+@requires_shared_memory
+def test_run_iter_2():
+    """Test arguments added while ParallelProcessor.run_iter is running are kept,
+     along with their shared memory, for the next run."""
+
+    # worker func
+    _worker = dummy_worker_4
+
+    # Init ParallelProcessor instance
+    parallel_processor = ParallelProcessor(worker=_worker, threads=2)
+
+    # Add arguments to ParallelProcessor instance
+    for i in range(1, 21):
+        parallel_processor.add_argument(process_id=i, func_args=(bytes(range(i)),))
+
+    # Add arguments after the first result has been retrieved
+    iterator = parallel_processor.run_iter(force_pool=True, timeout=10, chunksize=1)
+    results = dict([next(iterator)])
+
+    parallel_processor.add_argument(process_id=21, func_args=(b"\x01",))
+    parallel_processor.add_argument(process_id=22, shm_args={"data": b"\x02"})
+
+    results.update(iterator)
+
+    # Check that only the arguments stored when the run started have been run
+    assert results == {i: sum(range(i)) for i in range(1, 21)}
+    assert parallel_processor.ids == {21, 22}
+
+    # Check that the added arguments run in the next run
+    parallel_processor.run(force_pool=True)
+
+    assert {21: 1, 22: 2}.items() <= parallel_processor.results.items()
+    assert not parallel_processor.ids and not parallel_processor._shared_memory
+
+
+########################################################################################
+
+
 def main():
     """Empty fuction"""
 